@@ -2,15 +2,237 @@
 BlackRoad Git Server - GitLab-inspired repository manager
 Manages projects, merge requests, and CI pipelines
 """
+import asyncio
 import sqlite3
 from dataclasses import dataclass, asdict, field
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Iterator, Optional, Tuple
 from enum import Enum
 import json
 import hashlib
+import queue
+import re
+import threading
+import time
+import weakref
+from collections import Counter
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
 
+# The topics/labels/stages columns hold small JSON lists; orjson encodes and
+# decodes them several times faster than the stdlib when it is installed.
+try:
+    import orjson
+
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+
+    _loads = orjson.loads
+except ImportError:  # pragma: no cover - orjson is optional
+    _dumps = json.dumps
+    _loads = json.loads
+
+
+# Idle read connections kept open for reuse. Readers beyond this many at
+# once still get a connection, which is closed when they finish.
+READ_POOL_SIZE = 4
+
+# SQL text is kept at module level so every call passes the identical string
+# and hits sqlite3's per-connection statement cache instead of re-parsing.
+INSERT_PROJECT_SQL = "INSERT INTO projects VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+INSERT_MR_SQL = "INSERT INTO merge_requests VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+INSERT_REVIEW_SQL = "INSERT INTO reviews VALUES (?, ?, ?, ?, ?, ?)"
+INCREMENT_REVIEW_COUNT_SQL = "UPDATE merge_requests SET review_count = review_count + ? WHERE id = ?"
+MERGE_MR_SQL = "UPDATE merge_requests SET status = ?, merged_at = ? WHERE id = ? RETURNING *"
+INSERT_PIPELINE_SQL = "INSERT INTO pipelines VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+# stages/duration_s are only overwritten when given; finished_at is stamped
+# when the new status is terminal and cleared otherwise.
+UPDATE_PIPELINE_SQL = """
+    UPDATE pipelines
+    SET status = ?1,
+        stages = COALESCE(?2, stages),
+        finished_at = CASE WHEN ?1 IN ('passed', 'failed', 'cancelled') THEN ?3 ELSE NULL END,
+        duration_s = COALESCE(?4, duration_s)
+    WHERE id = ?5
+    RETURNING *
+"""
+COUNT_MRS_SQL = "SELECT COUNT(*) FROM merge_requests WHERE project_id = ?"
+COUNT_PIPELINES_SQL = (
+    "SELECT COUNT(*), SUM(CASE WHEN status = ? THEN 1 ELSE 0 END) "
+    "FROM pipelines WHERE project_id = ?"
+)
+SEARCH_PROJECTS_SQL = (
+    "SELECT p.* FROM projects p JOIN projects_fts f ON f.rowid = p.rowid "
+    "WHERE projects_fts MATCH ?"
+)
+SEARCH_PROJECTS_VISIBILITY_SQL = SEARCH_PROJECTS_SQL + " AND p.visibility = ?"
+LIST_PROJECTS_SQL = "SELECT * FROM projects"
+LIST_PROJECTS_VISIBILITY_SQL = "SELECT * FROM projects WHERE visibility = ?"
+# Rows pulled per fetchmany() when streaming result sets
+FETCH_BATCH_SIZE = 1000
+
+# The three feed streams are fetched in one compound query; SQLite only
+# allows ORDER BY/LIMIT per arm inside subqueries. Rows are
+# (kind, id, detail, timestamp).
+_ACTIVITY_FEED_SQL = """
+    SELECT * FROM (
+        SELECT 'push' AS kind, id, NULL AS detail, last_pushed_at AS ts FROM projects {where}
+        ORDER BY last_pushed_at DESC LIMIT ?
+    )
+    UNION ALL SELECT * FROM (
+        SELECT 'mr', id, title, created_at FROM merge_requests
+        ORDER BY created_at DESC LIMIT ?
+    )
+    UNION ALL SELECT * FROM (
+        SELECT 'pipeline', id, status, started_at FROM pipelines
+        ORDER BY started_at DESC LIMIT ?
+    )
+    ORDER BY kind, ts DESC
+"""
+ACTIVITY_FEED_SQL = _ACTIVITY_FEED_SQL.format(where="")
+ACTIVITY_FEED_NAMESPACE_SQL = _ACTIVITY_FEED_SQL.format(where="WHERE namespace = ?")
+
+
+def _now_us() -> int:
+    """Current time as integer epoch microseconds, the stored timestamp format"""
+    return time.time_ns() // 1000
+
+
+def _to_us(dt: datetime) -> int:
+    """Convert a naive local datetime to epoch microseconds"""
+    return round(dt.timestamp() * 1_000_000)
+
+
+def _from_us(us: int) -> datetime:
+    """Convert epoch microseconds to a naive local datetime"""
+    return datetime.fromtimestamp(us / 1_000_000)
+
+
+# Timestamps repeat across queries (the same rows are read again and again),
+# so decoded values are memoized rather than re-converted per row.
+_parse_ts = lru_cache(maxsize=4096)(_from_us)
+
+
+def _legacy_ts_to_us(value) -> Optional[int]:
+    """Convert a timestamp from a pre-INTEGER database: ISO-8601 text, or
+    digits stored as text by TEXT affinity, to epoch microseconds"""
+    if value is None or isinstance(value, int):
+        return value
+    if value.isdigit():
+        return int(value)
+    return _to_us(datetime.fromisoformat(value))
+
+
+def _short_id(s: str) -> str:
+    """Derive a stable 8-hex-char ID from a key string"""
+    return hashlib.blake2b(s.encode(), digest_size=4).hexdigest()
+
+
+# Search input limits; longer queries are rejected before reaching FTS5,
+# where every extra prefix term adds another index scan.
+MAX_QUERY_LENGTH = 256
+MAX_QUERY_TERMS = 16
+
+# Runs of the characters the unicode61 tokenizer keeps (letters and digits);
+# everything else, including LIKE wildcards, quotes and FTS5 syntax, is a
+# separator. A single character class cannot backtrack, so matching is linear.
+_QUERY_TERM_RE = re.compile(r"[^\W_]+")
+
+
+def _fts_query(query: str) -> str:
+    """Validate free text and turn it into an FTS5 MATCH expression
+
+    Each term is quoted, so nothing in user input is read as an FTS5
+    operator, and gets a prefix wildcard so partial words still match as
+    they did with LIKE.
+    """
+    if len(query) > MAX_QUERY_LENGTH:
+        raise ValueError(f"Search query longer than {MAX_QUERY_LENGTH} characters")
+    terms = _QUERY_TERM_RE.findall(query)
+    if len(terms) > MAX_QUERY_TERMS:
+        raise ValueError(f"Search query has more than {MAX_QUERY_TERMS} terms")
+    return " ".join(f'"{t}"*' for t in terms)
+
+
+# Table definitions, formatted with the table name so the timestamp
+# migration can build replacement tables from the same DDL.
+_TABLE_SCHEMAS = {
+    "projects": """
+        CREATE TABLE IF NOT EXISTS {table} (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            namespace TEXT NOT NULL,
+            description TEXT,
+            visibility TEXT DEFAULT 'private',
+            clone_url TEXT,
+            default_branch TEXT DEFAULT 'main',
+            has_ci BOOLEAN DEFAULT 0,
+            topics TEXT,
+            star_count INTEGER DEFAULT 0,
+            fork_count INTEGER DEFAULT 0,
+            created_at INTEGER,
+            last_pushed_at INTEGER,
+            UNIQUE(namespace, name)
+        )
+    """,
+    "merge_requests": """
+        CREATE TABLE IF NOT EXISTS {table} (
+            id TEXT PRIMARY KEY,
+            project_id TEXT NOT NULL,
+            title TEXT NOT NULL,
+            description TEXT,
+            source_branch TEXT DEFAULT 'feature',
+            target_branch TEXT DEFAULT 'main',
+            author TEXT,
+            assignee TEXT,
+            status TEXT DEFAULT 'opened',
+            created_at INTEGER,
+            merged_at INTEGER,
+            labels TEXT,
+            review_count INTEGER DEFAULT 0,
+            FOREIGN KEY (project_id) REFERENCES projects(id)
+        )
+    """,
+    "reviews": """
+        CREATE TABLE IF NOT EXISTS {table} (
+            id TEXT PRIMARY KEY,
+            mr_id TEXT NOT NULL,
+            reviewer TEXT,
+            action TEXT,
+            comment TEXT,
+            created_at INTEGER,
+            FOREIGN KEY (mr_id) REFERENCES merge_requests(id)
+        )
+    """,
+    "pipelines": """
+        CREATE TABLE IF NOT EXISTS {table} (
+            id TEXT PRIMARY KEY,
+            project_id TEXT NOT NULL,
+            ref TEXT,
+            sha TEXT,
+            status TEXT DEFAULT 'pending',
+            stages TEXT,
+            started_at INTEGER,
+            finished_at INTEGER,
+            duration_s INTEGER,
+            triggered_by TEXT DEFAULT 'push',
+            FOREIGN KEY (project_id) REFERENCES projects(id)
+        )
+    """,
+}
+
+# INTEGER epoch-microsecond columns; version 0 databases stored them as ISO text
+_TIMESTAMP_COLUMNS = {
+    "projects": ("created_at", "last_pushed_at"),
+    "merge_requests": ("created_at", "merged_at"),
+    "reviews": ("created_at",),
+    "pipelines": ("started_at", "finished_at"),
+}
+
+# Stored in PRAGMA user_version. 1: timestamps are INTEGER epoch microseconds.
+SCHEMA_VERSION = 1
+
 
 class MRStatus(Enum):
     OPENED = "opened"
@@ -33,7 +255,7 @@ class PipelineStatus(Enum):
     CANCELLED = "cancelled"
 
 
-@dataclass
+@dataclass(slots=True)
 class Project:
     """Represents a Git project/repository"""
     id: str
@@ -51,7 +273,7 @@ class Project:
     last_pushed_at: Optional[datetime] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class MergeRequest:
     """Represents a pull/merge request"""
     id: str
@@ -69,7 +291,7 @@ class MergeRequest:
     review_count: int = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class Review:
     """Represents a review on a merge request"""
     id: str
@@ -80,7 +302,7 @@ class Review:
     created_at: datetime = field(default_factory=datetime.now)
 
 
-@dataclass
+@dataclass(slots=True)
 class Pipeline:
     """Represents a CI/CD pipeline execution"""
     id: str
@@ -104,87 +326,251 @@ class GitServer:
         else:
             self.db_path = db_path or str(Path.home() / ".blackroad" / "git_server.db")
             Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        # One long-lived write connection. Writers queue on an in-process lock
+        # instead of spinning in SQLite's busy handler. Reads borrow a separate
+        # pooled connection, so WAL gives them the last committed snapshot and
+        # they never see the writer's open transaction.
+        self._write_lock = threading.Lock()
+        # asyncio locks bind to the loop that first contends for them, so
+        # each running loop gets its own, dropped when the loop is collected
+        self._async_write_locks = weakref.WeakKeyDictionary()
+        self._async_write_locks_guard = threading.Lock()
+        self._conn = self._open_conn()
+        self._idle_readers = queue.Queue(maxsize=READ_POOL_SIZE)
+        self._closed = False
+        # Cursors for the write statements, one per SQL string, on the write
+        # connection. Only used under _write_lock; reads use pooled connections.
+        self._stmt_cache: Dict[str, sqlite3.Cursor] = {}
         self._init_db()
 
+    def _open_conn(self) -> sqlite3.Connection:
+        """Open a connection tuned for concurrent readers and a single writer"""
+        conn = sqlite3.connect(
+            self.db_path, check_same_thread=False, isolation_level=None, cached_statements=256
+        )
+        # journal_mode is persisted in the database file; the rest are
+        # per-connection and must be applied every time a connection is opened.
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-65536")
+        conn.execute("PRAGMA mmap_size=268435456")
+        return conn
+
+    def close(self):
+        """Close the write connection and the idle read connections"""
+        self._closed = True
+        while True:
+            try:
+                self._idle_readers.get_nowait().close()
+            except queue.Empty:
+                break
+        self._conn.close()
+
+    @contextmanager
+    def _read_conn(self):
+        """Borrow a read connection from the pool for the enclosed block"""
+        try:
+            conn = self._idle_readers.get_nowait()
+        except queue.Empty:
+            conn = self._open_conn()
+        try:
+            yield conn
+        finally:
+            if self._closed:
+                conn.close()
+            else:
+                try:
+                    self._idle_readers.put_nowait(conn)
+                except queue.Full:
+                    conn.close()
+
+    def _query(self, sql: str, params=()) -> List[sqlite3.Row]:
+        """Run a read query and return all of its rows
+
+        An in-memory database exists only on the write connection, so its
+        reads go through that connection under _write_lock instead.
+        """
+        if self.db_path == ":memory:":
+            with self._write_lock:
+                return self._conn.execute(sql, params).fetchall()
+        with self._read_conn() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    async def _run_write(self, fn, *args, **kwargs):
+        """Run a blocking write method in a worker thread without blocking the event loop
+
+        Coroutines queue on the running loop's asyncio lock first, so waiting
+        writers do not each tie up a worker thread blocked on the threading
+        lock. Writes from different loops are still serialized by _write_lock.
+        """
+        loop = asyncio.get_running_loop()
+        with self._async_write_locks_guard:
+            lock = self._async_write_locks.get(loop)
+            if lock is None:
+                lock = self._async_write_locks[loop] = asyncio.Lock()
+        async with lock:
+            return await asyncio.to_thread(fn, *args, **kwargs)
+
+    def _cursor(self, sql: str) -> sqlite3.Cursor:
+        """Return the cached cursor for a write statement (caller holds _write_lock)"""
+        cur = self._stmt_cache.get(sql)
+        if cur is None:
+            cur = self._stmt_cache[sql] = self._conn.cursor()
+        return cur
+
+    def _exec(self, sql: str, params=()) -> sqlite3.Cursor:
+        """Execute a write statement on its cached cursor"""
+        return self._cursor(sql).execute(sql, params)
+
+    def _exec_many(self, sql: str, seq) -> sqlite3.Cursor:
+        """executemany a write statement on its cached cursor"""
+        return self._cursor(sql).executemany(sql, seq)
+
+    @contextmanager
+    def _transaction(self):
+        """Run the enclosed statements in one transaction (a single commit)"""
+        with self._write_lock:
+            self._exec("BEGIN")
+            try:
+                yield
+            except BaseException:
+                self._exec("ROLLBACK")
+                raise
+            self._exec("COMMIT")
+
     def _init_db(self):
         """Initialize SQLite database schema"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
+        c = self._conn.cursor()
+
+        version = c.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            self._migrate_timestamps(c)
 
+        for table, ddl in _TABLE_SCHEMAS.items():
+            c.execute(ddl.format(table=table))
+
+        # Full-text index over projects, kept in sync with the content table
+        # by triggers. Rebuilt once when added to a database that has rows.
+        fts_exists = c.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'projects_fts'"
+        ).fetchone()
         c.execute("""
-            CREATE TABLE IF NOT EXISTS projects (
-                id TEXT PRIMARY KEY,
-                name TEXT NOT NULL,
-                namespace TEXT NOT NULL,
-                description TEXT,
-                visibility TEXT DEFAULT 'private',
-                clone_url TEXT,
-                default_branch TEXT DEFAULT 'main',
-                has_ci BOOLEAN DEFAULT 0,
-                topics TEXT,
-                star_count INTEGER DEFAULT 0,
-                fork_count INTEGER DEFAULT 0,
-                created_at TEXT,
-                last_pushed_at TEXT,
-                UNIQUE(namespace, name)
+            CREATE VIRTUAL TABLE IF NOT EXISTS projects_fts USING fts5(
+                name, description,
+                content='projects', content_rowid='rowid',
+                tokenize='unicode61'
             )
         """)
-
         c.execute("""
-            CREATE TABLE IF NOT EXISTS merge_requests (
-                id TEXT PRIMARY KEY,
-                project_id TEXT NOT NULL,
-                title TEXT NOT NULL,
-                description TEXT,
-                source_branch TEXT DEFAULT 'feature',
-                target_branch TEXT DEFAULT 'main',
-                author TEXT,
-                assignee TEXT,
-                status TEXT DEFAULT 'opened',
-                created_at TEXT,
-                merged_at TEXT,
-                labels TEXT,
-                review_count INTEGER DEFAULT 0,
-                FOREIGN KEY (project_id) REFERENCES projects(id)
-            )
+            CREATE TRIGGER IF NOT EXISTS projects_fts_ai AFTER INSERT ON projects BEGIN
+                INSERT INTO projects_fts(rowid, name, description)
+                VALUES (new.rowid, new.name, new.description);
+            END
         """)
-
         c.execute("""
-            CREATE TABLE IF NOT EXISTS reviews (
-                id TEXT PRIMARY KEY,
-                mr_id TEXT NOT NULL,
-                reviewer TEXT,
-                action TEXT,
-                comment TEXT,
-                created_at TEXT,
-                FOREIGN KEY (mr_id) REFERENCES merge_requests(id)
-            )
+            CREATE TRIGGER IF NOT EXISTS projects_fts_ad AFTER DELETE ON projects BEGIN
+                INSERT INTO projects_fts(projects_fts, rowid, name, description)
+                VALUES ('delete', old.rowid, old.name, old.description);
+            END
         """)
-
         c.execute("""
-            CREATE TABLE IF NOT EXISTS pipelines (
-                id TEXT PRIMARY KEY,
-                project_id TEXT NOT NULL,
-                ref TEXT,
-                sha TEXT,
-                status TEXT DEFAULT 'pending',
-                stages TEXT,
-                started_at TEXT,
-                finished_at TEXT,
-                duration_s INTEGER,
-                triggered_by TEXT DEFAULT 'push',
-                FOREIGN KEY (project_id) REFERENCES projects(id)
-            )
+            CREATE TRIGGER IF NOT EXISTS projects_fts_au
+            AFTER UPDATE OF name, description ON projects BEGIN
+                INSERT INTO projects_fts(projects_fts, rowid, name, description)
+                VALUES ('delete', old.rowid, old.name, old.description);
+                INSERT INTO projects_fts(rowid, name, description)
+                VALUES (new.rowid, new.name, new.description);
+            END
         """)
+        if not fts_exists:
+            c.execute("INSERT INTO projects_fts(projects_fts) VALUES ('rebuild')")
+
+        # Indexes backing the project_id filters and the activity-feed ORDER BYs
+        c.execute("CREATE INDEX IF NOT EXISTS idx_mr_project ON merge_requests(project_id)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_mr_created ON merge_requests(created_at DESC)")
+        c.execute(
+            "CREATE INDEX IF NOT EXISTS idx_pipelines_project_status ON pipelines(project_id, status)"
+        )
+        c.execute("CREATE INDEX IF NOT EXISTS idx_pipelines_started ON pipelines(started_at DESC)")
+        c.execute(
+            "CREATE INDEX IF NOT EXISTS idx_projects_ns_pushed "
+            "ON projects(namespace, last_pushed_at DESC)"
+        )
+        c.execute("CREATE INDEX IF NOT EXISTS idx_reviews_mr ON reviews(mr_id)")
+        # Partial index so listing active pipelines scales with active, not total
+        c.execute(
+            "CREATE INDEX IF NOT EXISTS idx_pipelines_running ON pipelines(project_id) "
+            "WHERE status IN ('pending', 'running')"
+        )
 
-        conn.commit()
-        conn.close()
+        c.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _migrate_timestamps(self, c: sqlite3.Cursor):
+        """Rebuild tables created before timestamps became INTEGER columns
+
+        Those tables have TEXT affinity on the timestamp columns, which keeps
+        integers as text and sorts old ISO rows above new ones. Each existing
+        table is copied into one built from the current DDL, with ISO text
+        converted to epoch microseconds, and then swapped in place.
+        """
+        existing = [
+            table for table in _TABLE_SCHEMAS
+            if c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                         (table,)).fetchone()
+        ]
+        if not existing:
+            return
+
+        self._conn.create_function("_legacy_ts_to_us", 1, _legacy_ts_to_us, deterministic=True)
+        c.execute("BEGIN")
+        try:
+            # Rebuilding projects changes its rowids; drop the FTS index so
+            # it is recreated and rebuilt below
+            c.execute("DROP TABLE IF EXISTS projects_fts")
+            for table in existing:
+                columns = [row[1] for row in c.execute(f"PRAGMA table_info({table})")]
+                select = ", ".join(
+                    f"_legacy_ts_to_us({col})" if col in _TIMESTAMP_COLUMNS[table] else col
+                    for col in columns
+                )
+                c.execute(_TABLE_SCHEMAS[table].format(table=f"{table}_new"))
+                c.execute(f"INSERT INTO {table}_new ({', '.join(columns)}) "
+                          f"SELECT {select} FROM {table}")
+                c.execute(f"DROP TABLE {table}")
+                c.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+        except BaseException:
+            c.execute("ROLLBACK")
+            raise
+        c.execute("COMMIT")
 
     def create_project(self, namespace: str, name: str, description: str = "",
                       visibility: str = "private", default_branch: str = "main") -> Project:
         """Create a new project in the repository"""
-        project_id = hashlib.md5(f"{namespace}/{name}".encode()).hexdigest()[:8]
+        return self.create_projects_bulk(
+            [(namespace, name, description, visibility, default_branch)]
+        )[0]
+
+    def create_projects_bulk(self, specs: List[Tuple]) -> List[Project]:
+        """Create many projects in a single transaction
+
+        Each spec holds create_project's positional arguments:
+        (namespace, name[, description, visibility, default_branch]).
+        """
+        built = [self._new_project(*spec) for spec in specs]
+        with self._transaction():
+            self._exec_many(INSERT_PROJECT_SQL, [row for _, row in built])
+        return [project for project, _ in built]
+
+    def _new_project(self, namespace: str, name: str, description: str = "",
+                     visibility: str = "private",
+                     default_branch: str = "main") -> Tuple[Project, tuple]:
+        """Build a Project and its database row"""
+        project_id = _short_id(f"{namespace}/{name}")
         clone_url = f"git@git.blackroad.local:{namespace}/{name}.git"
+        now_us = _now_us()
 
         project = Project(
             id=project_id,
@@ -194,27 +580,40 @@ class GitServer:
             visibility=visibility,
             clone_url=clone_url,
             default_branch=default_branch,
-            created_at=datetime.now()
+            created_at=_from_us(now_us)
         )
-
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute("""
-            INSERT INTO projects VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
+        row = (
             project.id, project.name, project.namespace, project.description,
             project.visibility, project.clone_url, project.default_branch, False,
-            json.dumps(project.topics), project.star_count, project.fork_count,
-            project.created_at.isoformat(), None
-        ))
-        conn.commit()
-        conn.close()
-        return project
+            _dumps(project.topics), project.star_count, project.fork_count,
+            now_us, None
+        )
+        return project, row
 
     def create_mr(self, project_id: str, title: str, source_branch: str,
                  target_branch: str, author: str, description: str = "") -> MergeRequest:
         """Create a merge request"""
-        mr_id = hashlib.md5(f"{project_id}/{title}".encode()).hexdigest()[:8]
+        return self.create_mrs_bulk(
+            [(project_id, title, source_branch, target_branch, author, description)]
+        )[0]
+
+    def create_mrs_bulk(self, specs: List[Tuple]) -> List[MergeRequest]:
+        """Create many merge requests in a single transaction
+
+        Each spec holds create_mr's positional arguments:
+        (project_id, title, source_branch, target_branch, author[, description]).
+        """
+        built = [self._new_mr(*spec) for spec in specs]
+        with self._transaction():
+            self._exec_many(INSERT_MR_SQL, [row for _, row in built])
+        return [mr for mr, _ in built]
+
+    def _new_mr(self, project_id: str, title: str, source_branch: str,
+                target_branch: str, author: str,
+                description: str = "") -> Tuple[MergeRequest, tuple]:
+        """Build a MergeRequest and its database row"""
+        mr_id = _short_id(f"{project_id}/{title}")
+        now_us = _now_us()
 
         mr = MergeRequest(
             id=mr_id,
@@ -225,25 +624,19 @@ class GitServer:
             target_branch=target_branch,
             author=author,
             status=MRStatus.OPENED.value,
-            created_at=datetime.now()
+            created_at=_from_us(now_us)
         )
-
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute("""
-            INSERT INTO merge_requests VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
+        row = (
             mr.id, mr.project_id, mr.title, mr.description, mr.source_branch,
-            mr.target_branch, mr.author, None, mr.status, mr.created_at.isoformat(),
-            None, json.dumps(mr.labels), mr.review_count
-        ))
-        conn.commit()
-        conn.close()
-        return mr
+            mr.target_branch, mr.author, None, mr.status, now_us,
+            None, _dumps(mr.labels), mr.review_count
+        )
+        return mr, row
 
     def review_mr(self, mr_id: str, reviewer: str, action: str, comment: str = "") -> Review:
         """Add a review to a merge request"""
-        review_id = hashlib.md5(f"{mr_id}/{reviewer}".encode()).hexdigest()[:8]
+        review_id = _short_id(f"{mr_id}/{reviewer}")
+        now_us = _now_us()
 
         review = Review(
             id=review_id,
@@ -251,47 +644,57 @@ class GitServer:
             reviewer=reviewer,
             action=action,
             comment=comment,
-            created_at=datetime.now()
+            created_at=_from_us(now_us)
         )
+        self.review_mr_bulk([review])
+        return review
 
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute("""
-            INSERT INTO reviews VALUES (?, ?, ?, ?, ?, ?)
-        """, (review.id, review.mr_id, review.reviewer, review.action, review.comment,
-              review.created_at.isoformat()))
+    def review_mr_bulk(self, reviews: List[Review]) -> List[Review]:
+        """Add many reviews in a single transaction"""
+        rows = [
+            (r.id, r.mr_id, r.reviewer, r.action, r.comment, _to_us(r.created_at))
+            for r in reviews
+        ]
+        counts = Counter(r.mr_id for r in reviews)
 
-        c.execute("UPDATE merge_requests SET review_count = review_count + 1 WHERE id = ?", (mr_id,))
-        conn.commit()
-        conn.close()
-        return review
+        with self._transaction():
+            self._exec_many(INSERT_REVIEW_SQL, rows)
+            self._exec_many(INCREMENT_REVIEW_COUNT_SQL,
+                            [(n, mr_id) for mr_id, n in counts.items()])
+        return reviews
 
     def merge_mr(self, mr_id: str, merged_by: str, squash: bool = False) -> MergeRequest:
         """Merge a merge request"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-
-        merged_at = datetime.now().isoformat()
-        c.execute("""
-            UPDATE merge_requests SET status = ?, merged_at = ? WHERE id = ?
-        """, (MRStatus.MERGED.value, merged_at, mr_id))
-
-        conn.commit()
-        conn.close()
-
-        c.execute("SELECT * FROM merge_requests WHERE id = ?", (mr_id,))
-        row = c.fetchone()
-        return MergeRequest(
-            id=row[0], project_id=row[1], title=row[2], description=row[3],
-            source_branch=row[4], target_branch=row[5], author=row[6],
-            status=row[8], created_at=datetime.fromisoformat(row[9]),
-            merged_at=datetime.fromisoformat(merged_at) if merged_at else None
-        )
+        merged_at = _now_us()
+        with self._write_lock:
+            row = self._exec(
+                MERGE_MR_SQL, (MRStatus.MERGED.value, merged_at, mr_id)
+            ).fetchone()
+        if row is None:
+            raise ValueError(f"Merge request {mr_id} not found")
+        return self._mr_from_row(row)
 
     def create_pipeline(self, project_id: str, ref: str, sha: str,
                        triggered_by: str = "push") -> Pipeline:
         """Create a new CI/CD pipeline"""
-        pipeline_id = hashlib.md5(f"{project_id}/{sha}".encode()).hexdigest()[:8]
+        return self.create_pipelines_bulk([(project_id, ref, sha, triggered_by)])[0]
+
+    def create_pipelines_bulk(self, specs: List[Tuple]) -> List[Pipeline]:
+        """Create many pipelines in a single transaction
+
+        Each spec holds create_pipeline's positional arguments:
+        (project_id, ref, sha[, triggered_by]).
+        """
+        built = [self._new_pipeline(*spec) for spec in specs]
+        with self._transaction():
+            self._exec_many(INSERT_PIPELINE_SQL, [row for _, row in built])
+        return [pipeline for pipeline, _ in built]
+
+    def _new_pipeline(self, project_id: str, ref: str, sha: str,
+                      triggered_by: str = "push") -> Tuple[Pipeline, tuple]:
+        """Build a Pipeline and its database row"""
+        pipeline_id = _short_id(f"{project_id}/{sha}")
+        now_us = _now_us()
 
         pipeline = Pipeline(
             id=pipeline_id,
@@ -300,55 +703,39 @@ class GitServer:
             sha=sha,
             status=PipelineStatus.PENDING.value,
             triggered_by=triggered_by,
-            started_at=datetime.now()
+            started_at=_from_us(now_us)
         )
-
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute("""
-            INSERT INTO pipelines VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (pipeline.id, pipeline.project_id, pipeline.ref, pipeline.sha,
-              pipeline.status, json.dumps(pipeline.stages),
-              pipeline.started_at.isoformat(), None, None, pipeline.triggered_by))
-        conn.commit()
-        conn.close()
-        return pipeline
+        row = (
+            pipeline.id, pipeline.project_id, pipeline.ref, pipeline.sha,
+            pipeline.status, _dumps(pipeline.stages),
+            now_us, None, None, pipeline.triggered_by
+        )
+        return pipeline, row
 
     def update_pipeline(self, pipeline_id: str, status: str,
-                       stages: Optional[List[str]] = None, duration_s: Optional[int] = None):
+                       stages: Optional[List[str]] = None,
+                       duration_s: Optional[int] = None) -> Pipeline:
         """Update pipeline status and stages"""
-        finished_at = datetime.now().isoformat() if status in [
-            PipelineStatus.PASSED.value, PipelineStatus.FAILED.value, PipelineStatus.CANCELLED.value
-        ] else None
-
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute("""
-            UPDATE pipelines SET status = ?, stages = ?, finished_at = ?, duration_s = ? WHERE id = ?
-        """, (status, json.dumps(stages or []), finished_at, duration_s, pipeline_id))
-        conn.commit()
-        conn.close()
+        with self._write_lock:
+            row = self._exec(UPDATE_PIPELINE_SQL, (
+                status, _dumps(stages) if stages is not None else None, _now_us(),
+                duration_s, pipeline_id
+            )).fetchone()
+        if row is None:
+            raise ValueError(f"Pipeline {pipeline_id} not found")
+        return self._pipeline_from_row(row)
 
     def get_project_stats(self, project_id: str) -> Dict:
         """Get statistics for a project"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-
-        c.execute("SELECT COUNT(*) FROM merge_requests WHERE project_id = ?", (project_id,))
-        mr_count = c.fetchone()[0]
-
-        c.execute("SELECT COUNT(*) FROM pipelines WHERE project_id = ?", (project_id,))
-        pipeline_count = c.fetchone()[0]
-
-        c.execute("""
-            SELECT COUNT(*) FROM pipelines
-            WHERE project_id = ? AND status = ?
-        """, (project_id, PipelineStatus.PASSED.value))
-        passed_count = c.fetchone()[0]
+        mr_count = self._query(COUNT_MRS_SQL, (project_id,))[0][0]
+        pipeline_count, passed_count = self._query(
+            COUNT_PIPELINES_SQL, (PipelineStatus.PASSED.value, project_id)
+        )[0]
+        # SUM over zero rows is NULL
+        passed_count = passed_count or 0
 
         pass_rate = (passed_count / pipeline_count * 100) if pipeline_count > 0 else 0
 
-        conn.close()
         return {
             "project_id": project_id,
             "merge_requests": mr_count,
@@ -357,67 +744,146 @@ class GitServer:
             "pass_rate": f"{pass_rate:.1f}%"
         }
 
-    def search_projects(self, query: str, visibility: Optional[str] = None) -> List[Project]:
-        """Search projects by name and description"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-
-        if visibility:
-            c.execute("""
-                SELECT * FROM projects WHERE (name LIKE ? OR description LIKE ?) AND visibility = ?
-            """, (f"%{query}%", f"%{query}%", visibility))
+    def search_projects(self, query: str, visibility: Optional[str] = None) -> Iterator[Project]:
+        """Search projects by name and description
+
+        Results are streamed; wrap in list() when a materialized list is needed.
+        """
+        return map(self._project_from_row, self.search_projects_raw(query, visibility))
+
+    def search_projects_raw(self, query: str,
+                            visibility: Optional[str] = None) -> Iterator[sqlite3.Row]:
+        """Search projects, streaming undecoded rows for callers that only need mappings
+
+        Raises ValueError for queries over MAX_QUERY_LENGTH or MAX_QUERY_TERMS.
+        """
+        match = _fts_query(query)
+        if not query.strip():
+            # An empty query matches everything, as the old LIKE '%%' did
+            if visibility:
+                sql, params = LIST_PROJECTS_VISIBILITY_SQL, (visibility,)
+            else:
+                sql, params = LIST_PROJECTS_SQL, ()
+        elif not match:
+            # Only punctuation: no indexed term can match
+            return iter(())
+        elif visibility:
+            sql, params = SEARCH_PROJECTS_VISIBILITY_SQL, (match, visibility)
         else:
-            c.execute("""
-                SELECT * FROM projects WHERE name LIKE ? OR description LIKE ?
-            """, (f"%{query}%", f"%{query}%"))
-
-        rows = c.fetchall()
-        conn.close()
-        return [self._project_from_row(row) for row in rows]
+            sql, params = SEARCH_PROJECTS_SQL, (match,)
+        return self._stream(sql, params)
+
+    def _stream(self, sql: str, params=()) -> Iterator[sqlite3.Row]:
+        """Yield the rows of a read query in fetchmany batches
+
+        The stream holds its own pooled connection until it is exhausted or
+        dropped, so a half-consumed iterator does not pin an old snapshot
+        for the other reads made meanwhile.
+        """
+        if self.db_path == ":memory:":
+            # The write lock cannot be held across yields, so in-memory
+            # results are fetched in one go
+            yield from self._query(sql, params)
+            return
+        with self._read_conn() as conn:
+            c = conn.cursor()
+            try:
+                c.arraysize = FETCH_BATCH_SIZE
+                c.execute(sql, params)
+                while rows := c.fetchmany():
+                    yield from rows
+            finally:
+                c.close()
 
     def get_activity_feed(self, namespace: Optional[str] = None, n: int = 20) -> Dict:
         """Get recent activity feed"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-
         if namespace:
-            c.execute("""
-                SELECT id, last_pushed_at FROM projects WHERE namespace = ? ORDER BY last_pushed_at DESC LIMIT ?
-            """, (namespace, n))
+            rows = self._query(ACTIVITY_FEED_NAMESPACE_SQL, (namespace, n, n, n))
         else:
-            c.execute("""
-                SELECT id, last_pushed_at FROM projects ORDER BY last_pushed_at DESC LIMIT ?
-            """, (n,))
-
-        pushes = c.fetchall()
-
-        c.execute("""
-            SELECT id, title, created_at FROM merge_requests ORDER BY created_at DESC LIMIT ?
-        """, (n,))
-        mrs = c.fetchall()
-
-        c.execute("""
-            SELECT id, status, started_at FROM pipelines ORDER BY started_at DESC LIMIT ?
-        """, (n,))
-        pipelines = c.fetchall()
-
-        conn.close()
-
-        return {
-            "recent_pushes": [{"project_id": p[0], "timestamp": p[1]} for p in pushes],
-            "recent_mrs": [{"id": m[0], "title": m[1], "created_at": m[2]} for m in mrs],
-            "recent_pipelines": [{"id": p[0], "status": p[1], "started_at": p[2]} for p in pipelines]
-        }
+            rows = self._query(ACTIVITY_FEED_SQL, (n, n, n))
+
+        feed = {"recent_pushes": [], "recent_mrs": [], "recent_pipelines": []}
+        for kind, item_id, detail, ts in rows:
+            if kind == "push":
+                feed["recent_pushes"].append({"project_id": item_id, "timestamp": ts})
+            elif kind == "mr":
+                feed["recent_mrs"].append({"id": item_id, "title": detail, "created_at": ts})
+            else:
+                feed["recent_pipelines"].append({"id": item_id, "status": detail, "started_at": ts})
+        return feed
+
+    # Async API: the same write methods run off the event loop, queued on the
+    # async write lock so concurrent requests do not exhaust worker threads.
+
+    async def acreate_project(self, namespace: str, name: str, description: str = "",
+                              visibility: str = "private",
+                              default_branch: str = "main") -> Project:
+        """Async variant of create_project"""
+        return await self._run_write(self.create_project, namespace, name, description,
+                                     visibility, default_branch)
+
+    async def acreate_mr(self, project_id: str, title: str, source_branch: str,
+                         target_branch: str, author: str, description: str = "") -> MergeRequest:
+        """Async variant of create_mr"""
+        return await self._run_write(self.create_mr, project_id, title, source_branch,
+                                     target_branch, author, description)
+
+    async def areview_mr(self, mr_id: str, reviewer: str, action: str,
+                         comment: str = "") -> Review:
+        """Async variant of review_mr"""
+        return await self._run_write(self.review_mr, mr_id, reviewer, action, comment)
+
+    async def areview_mr_bulk(self, reviews: List[Review]) -> List[Review]:
+        """Async variant of review_mr_bulk"""
+        return await self._run_write(self.review_mr_bulk, reviews)
+
+    async def amerge_mr(self, mr_id: str, merged_by: str, squash: bool = False) -> MergeRequest:
+        """Async variant of merge_mr"""
+        return await self._run_write(self.merge_mr, mr_id, merged_by, squash)
+
+    async def acreate_pipeline(self, project_id: str, ref: str, sha: str,
+                               triggered_by: str = "push") -> Pipeline:
+        """Async variant of create_pipeline"""
+        return await self._run_write(self.create_pipeline, project_id, ref, sha, triggered_by)
+
+    async def aupdate_pipeline(self, pipeline_id: str, status: str,
+                               stages: Optional[List[str]] = None,
+                               duration_s: Optional[int] = None) -> Pipeline:
+        """Async variant of update_pipeline"""
+        return await self._run_write(self.update_pipeline, pipeline_id, status, stages,
+                                     duration_s)
 
     def _project_from_row(self, row) -> Project:
         """Convert database row to Project object"""
         return Project(
             id=row[0], name=row[1], namespace=row[2], description=row[3],
             visibility=row[4], clone_url=row[5], default_branch=row[6],
-            has_ci=bool(row[7]), topics=json.loads(row[8]),
+            has_ci=bool(row[7]), topics=_loads(row[8]),
             star_count=row[9], fork_count=row[10],
-            created_at=datetime.fromisoformat(row[11]),
-            last_pushed_at=datetime.fromisoformat(row[12]) if row[12] else None
+            created_at=_parse_ts(row[11]),
+            last_pushed_at=_parse_ts(row[12]) if row[12] else None
+        )
+
+    def _mr_from_row(self, row) -> MergeRequest:
+        """Convert database row to MergeRequest object"""
+        return MergeRequest(
+            id=row[0], project_id=row[1], title=row[2], description=row[3],
+            source_branch=row[4], target_branch=row[5], author=row[6],
+            assignee=row[7], status=row[8],
+            created_at=_parse_ts(row[9]),
+            merged_at=_parse_ts(row[10]) if row[10] else None,
+            labels=_loads(row[11]) if row[11] else [],
+            review_count=row[12]
+        )
+
+    def _pipeline_from_row(self, row) -> Pipeline:
+        """Convert database row to Pipeline object"""
+        return Pipeline(
+            id=row[0], project_id=row[1], ref=row[2], sha=row[3], status=row[4],
+            stages=_loads(row[5]) if row[5] else [],
+            started_at=_parse_ts(row[6]) if row[6] else None,
+            finished_at=_parse_ts(row[7]) if row[7] else None,
+            duration_s=row[8], triggered_by=row[9]
         )
 
 
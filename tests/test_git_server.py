@@ -1,5 +1,11 @@
+import asyncio
+import sqlite3
+import threading
+from datetime import datetime
+
 import pytest
-from src.git_server import GitServer
+from src import git_server
+from src.git_server import INSERT_PROJECT_SQL, READ_POOL_SIZE, GitServer, Review
 
 def test_create_project():
     server = GitServer(":memory:")
@@ -10,5 +16,267 @@ def test_create_project():
 def test_search_projects():
     server = GitServer(":memory:")
     server.create_project("blackroad", "os-core", "Core OS")
-    results = server.search_projects("core")
+    results = list(server.search_projects("core"))
     assert len(results) > 0
+
+def test_review_mr_bulk():
+    server = GitServer(":memory:")
+    project = server.create_project("blackroad", "os-core")
+    mr = server.create_mr(project.id, "Add feature", "feature", "main", "alice")
+    server.review_mr(mr.id, "bob", "approve")
+    server.review_mr_bulk([
+        Review(id="r1", mr_id=mr.id, reviewer="carol", action="comment"),
+        Review(id="r2", mr_id=mr.id, reviewer="dave", action="approve"),
+    ])
+    row = server._conn.execute(
+        "SELECT review_count FROM merge_requests WHERE id = ?", (mr.id,)
+    ).fetchone()
+    assert row[0] == 3
+
+def test_reads_do_not_see_uncommitted_writes(tmp_path):
+    server = GitServer(str(tmp_path / "git.db"))
+    seen = []
+    with pytest.raises(RuntimeError):
+        with server._transaction():
+            server._conn.execute(INSERT_PROJECT_SQL, (
+                "g1", "ghost", "blackroad", "phantom", "private", "", "main", False,
+                "[]", 0, 0, None, None
+            ))
+            reader = threading.Thread(
+                target=lambda: seen.extend(p.name for p in server.search_projects("phantom"))
+            )
+            reader.start()
+            reader.join()
+            raise RuntimeError("roll back")
+    assert seen == []
+    assert list(server.search_projects("phantom")) == []
+    server.close()
+
+def test_read_connections_are_bounded(tmp_path):
+    server = GitServer(str(tmp_path / "git.db"))
+    project = server.create_project("blackroad", "os-core")
+    threads = [
+        threading.Thread(target=server.get_project_stats, args=(project.id,)) for _ in range(50)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert server._idle_readers.qsize() <= READ_POOL_SIZE
+    server.close()
+
+def test_async_writes_across_event_loops():
+    server = GitServer(":memory:")
+    project = server.create_project("blackroad", "os-core")
+
+    async def batch(start):
+        await asyncio.gather(*(
+            server._run_write(server.create_pipeline, project.id, "main", f"sha{i}")
+            for i in range(start, start + 5)
+        ))
+
+    asyncio.run(batch(0))
+    asyncio.run(batch(5))
+    assert server.get_project_stats(project.id)["pipelines"] == 10
+
+def test_get_project_stats():
+    server = GitServer(":memory:")
+    project = server.create_project("blackroad", "os-core")
+    assert server.get_project_stats(project.id)["passed_pipelines"] == 0
+    p1 = server.create_pipeline(project.id, "main", "abc123")
+    server.create_pipeline(project.id, "main", "def456")
+    server.update_pipeline(p1.id, "passed")
+    stats = server.get_project_stats(project.id)
+    assert stats["pipelines"] == 2
+    assert stats["passed_pipelines"] == 1
+    assert stats["pass_rate"] == "50.0%"
+
+def test_search_projects_fulltext():
+    server = GitServer(":memory:")
+    server.create_project("blackroad", "os-core", "Core operating system", visibility="public")
+    server.create_project("blackroad", "web-ui", "Dashboard frontend")
+    assert [p.name for p in server.search_projects("operat")] == ["os-core"]
+    assert [p.name for p in server.search_projects("dashboard")] == ["web-ui"]
+    assert list(server.search_projects("dashboard", visibility="public")) == []
+    assert list(server.search_projects('"core" OR')) == []
+    assert len(list(server.search_projects(""))) == 2
+
+def test_merge_mr():
+    server = GitServer(":memory:")
+    project = server.create_project("blackroad", "os-core")
+    mr = server.create_mr(project.id, "Add feature", "feature", "main", "alice")
+    server.review_mr(mr.id, "bob", "approve")
+    merged = server.merge_mr(mr.id, "bob")
+    assert merged.status == "merged"
+    assert merged.merged_at is not None
+    assert merged.review_count == 1
+    with pytest.raises(ValueError):
+        server.merge_mr("missing", "bob")
+
+def test_search_projects_raw():
+    server = GitServer(":memory:")
+    server.create_project("blackroad", "os-core", "Core OS")
+    rows = server.search_projects_raw("core")
+    assert [dict(row)["name"] for row in rows] == ["os-core"]
+
+def test_get_activity_feed():
+    server = GitServer(":memory:")
+    core = server.create_project("blackroad", "os-core")
+    server.create_project("other", "tools")
+    server.create_mr(core.id, "First", "feature", "main", "alice")
+    server.create_mr(core.id, "Second", "fix", "main", "alice")
+    server.create_pipeline(core.id, "main", "abc123")
+    feed = server.get_activity_feed(namespace="blackroad", n=5)
+    assert [p["project_id"] for p in feed["recent_pushes"]] == [core.id]
+    assert [m["title"] for m in feed["recent_mrs"]] == ["Second", "First"]
+    assert feed["recent_pipelines"][0]["status"] == "pending"
+    assert len(server.get_activity_feed(n=1)["recent_mrs"]) == 1
+
+def test_timestamps_stored_as_epoch_us():
+    server = GitServer(":memory:")
+    project = server.create_project("blackroad", "os-core", "Core OS")
+    mr = server.create_mr(project.id, "Add feature", "feature", "main", "alice")
+    assert next(server.search_projects("core")).created_at == project.created_at
+    created_at = server.get_activity_feed()["recent_mrs"][0]["created_at"]
+    assert isinstance(created_at, int)
+    assert server.merge_mr(mr.id, "bob").created_at == mr.created_at
+
+def test_migrates_iso_timestamps(tmp_path):
+    db_path = str(tmp_path / "git.db")
+    # Schema and rows as written before timestamps became INTEGER columns
+    conn = sqlite3.connect(db_path)
+    conn.execute("""CREATE TABLE projects (id TEXT PRIMARY KEY, name TEXT NOT NULL,
+        namespace TEXT NOT NULL, description TEXT, visibility TEXT DEFAULT 'private',
+        clone_url TEXT, default_branch TEXT DEFAULT 'main', has_ci BOOLEAN DEFAULT 0,
+        topics TEXT, star_count INTEGER DEFAULT 0, fork_count INTEGER DEFAULT 0,
+        created_at TEXT, last_pushed_at TEXT, UNIQUE(namespace, name))""")
+    conn.execute("""CREATE TABLE merge_requests (id TEXT PRIMARY KEY,
+        project_id TEXT NOT NULL, title TEXT NOT NULL, description TEXT,
+        source_branch TEXT DEFAULT 'feature', target_branch TEXT DEFAULT 'main',
+        author TEXT, assignee TEXT, status TEXT DEFAULT 'opened', created_at TEXT,
+        merged_at TEXT, labels TEXT, review_count INTEGER DEFAULT 0)""")
+    conn.execute("INSERT INTO projects VALUES ('p1', 'os-core', 'blackroad', 'Core OS', "
+                 "'private', '', 'main', 0, '[]', 0, 0, '2020-01-02T03:04:05.000006', NULL)")
+    conn.execute("INSERT INTO merge_requests VALUES ('m1', 'p1', 'Old', '', 'feature', 'main', "
+                 "'alice', NULL, 'opened', '2020-01-02T03:04:05', NULL, '[]', 0)")
+    conn.commit()
+    conn.close()
+
+    server = GitServer(db_path)
+    server.create_mr("p1", "New", "fix", "main", "alice")
+    recent = server.get_activity_feed()["recent_mrs"]
+    assert [m["title"] for m in recent] == ["New", "Old"]
+    assert all(isinstance(m["created_at"], int) for m in recent)
+    project = next(server.search_projects("core"))
+    assert project.created_at == datetime(2020, 1, 2, 3, 4, 5, 6)
+    server.close()
+
+    # Reopening does not migrate again
+    server = GitServer(db_path)
+    assert server._conn.execute("PRAGMA user_version").fetchone()[0] == 1
+    assert len(server.get_activity_feed()["recent_mrs"]) == 2
+    server.close()
+
+def test_async_writes():
+    server = GitServer(":memory:")
+
+    async def run():
+        project = await server.acreate_project("blackroad", "os-core")
+        await asyncio.gather(*(
+            server.acreate_pipeline(project.id, "main", f"sha{i}") for i in range(10)
+        ))
+        return project
+
+    project = asyncio.run(run())
+    assert server.get_project_stats(project.id)["pipelines"] == 10
+
+def test_bulk_create():
+    server = GitServer(":memory:")
+    projects = server.create_projects_bulk([
+        ("blackroad", "os-core", "Core OS"),
+        ("blackroad", "web-ui", "Dashboard", "public"),
+    ])
+    assert [p.visibility for p in projects] == ["private", "public"]
+    core = projects[0]
+    mrs = server.create_mrs_bulk([
+        (core.id, "First", "feature", "main", "alice"),
+        (core.id, "Second", "fix", "main", "bob"),
+    ])
+    pipelines = server.create_pipelines_bulk([(core.id, "main", "abc"), (core.id, "main", "def")])
+    stats = server.get_project_stats(core.id)
+    assert stats["merge_requests"] == len(mrs) == 2
+    assert stats["pipelines"] == len(pipelines) == 2
+
+def test_bulk_create_is_atomic():
+    server = GitServer(":memory:")
+    with pytest.raises(sqlite3.IntegrityError):
+        server.create_projects_bulk([("blackroad", "os-core"), ("blackroad", "os-core")])
+    assert list(server.search_projects("")) == []
+
+def test_update_pipeline():
+    server = GitServer(":memory:")
+    project = server.create_project("blackroad", "os-core")
+    pipeline = server.create_pipeline(project.id, "main", "abc123")
+    running = server.update_pipeline(pipeline.id, "running", stages=["build", "test"])
+    assert running.stages == ["build", "test"]
+    assert running.finished_at is None
+    passed = server.update_pipeline(pipeline.id, "passed", duration_s=42)
+    assert passed.stages == ["build", "test"]
+    assert passed.duration_s == 42
+    assert passed.finished_at is not None
+    with pytest.raises(ValueError):
+        server.update_pipeline("missing", "passed")
+
+def test_search_projects_streams_batches(tmp_path, monkeypatch):
+    fetched = []
+
+    class CountingCursor(sqlite3.Cursor):
+        def fetchmany(self, *args):
+            rows = super().fetchmany(*args)
+            fetched.append(len(rows))
+            return rows
+
+    class CountingConnection(sqlite3.Connection):
+        def cursor(self, factory=CountingCursor):
+            return super().cursor(factory)
+
+    connect = sqlite3.connect
+    monkeypatch.setattr(sqlite3, "connect",
+                        lambda *args, **kwargs: connect(*args, factory=CountingConnection,
+                                                        **kwargs))
+    monkeypatch.setattr(git_server, "FETCH_BATCH_SIZE", 100)
+    server = GitServer(str(tmp_path / "git.db"))
+    server.create_projects_bulk([("blackroad", f"svc-{i}", "Service") for i in range(250)])
+    results = server.search_projects("service")
+    assert next(results).description == "Service"
+    assert fetched == [100]
+    assert sum(1 for _ in results) == 249
+    assert fetched == [100, 100, 50, 0]
+    server.close()
+
+def test_open_stream_does_not_pin_snapshot(tmp_path):
+    server = GitServer(str(tmp_path / "git.db"))
+    projects = server.create_projects_bulk(
+        [("blackroad", f"svc-{i}", "Service") for i in range(1500)]
+    )
+    results = server.search_projects("service")
+    next(results)
+    assert server.get_project_stats(projects[0].id)["pipelines"] == 0
+    server.create_pipeline(projects[0].id, "main", "abc123")
+    assert server.get_project_stats(projects[0].id)["pipelines"] == 1
+    assert sum(1 for _ in results) == 1499
+    server.close()
+
+def test_search_projects_sanitizes_query():
+    server = GitServer(":memory:")
+    server.create_project("blackroad", "os-core", "Core OS")
+    assert [p.name for p in server.search_projects("%core_")] == ["os-core"]
+    assert [p.name for p in server.search_projects("os-core")] == ["os-core"]
+    assert list(server.search_projects("core NOT os")) == []
+    assert list(server.search_projects("!!!")) == []
+    assert list(server.search_projects(" - ")) == []
+    assert len(list(server.search_projects("   "))) == 1
+    with pytest.raises(ValueError):
+        server.search_projects("a" * 300)
+    with pytest.raises(ValueError):
+        server.search_projects(" ".join(["core"] * 20))